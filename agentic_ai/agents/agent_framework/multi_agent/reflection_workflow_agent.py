@@ -9,59 +9,184 @@ Key Design:
 - All PrimaryAgent outputs go to ReviewerAgent for evaluation
 - ReviewerAgent acts as a conditional gate: approve or request_for_edit
 - Conversation history is maintained between user and PrimaryAgent only
-- History is passed to both agents for context
+- History lives in a single running message list shared by both agents
 """
 
+import asyncio
+import hashlib
+import itertools
 import json
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict, List
+import os
+import textwrap
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
 from uuid import uuid4
 
 from agent_framework import (
     AgentRunResponseUpdate,
     AgentRunUpdateEvent,
     ChatMessage,
+    ChatResponse,
+    ChatResponseUpdate,
     Contents,
     Executor,
+    FunctionResultContent,
     MCPStreamableHTTPTool,
     Role,
+    TextContent,
     WorkflowBuilder,
     WorkflowContext,
     handler,
 )
 from agent_framework.azure import AzureOpenAIChatClient
-from pydantic import BaseModel
+from cachetools import TTLCache
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+# Echo workflow traces to stdout as well as the logger (local debugging only)
+_AGENT_DEBUG = bool(os.environ.get("AGENT_DEBUG"))
+
+
+def _trace(msg: str, *args: Any, level: int = logging.INFO) -> None:
+    """Log with deferred %-formatting so disabled levels never build the string."""
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, *args)
+    if __debug__ and _AGENT_DEBUG:
+        print(msg % args)
+
+
+# Cheap signals used by the ReviewerAgent to auto-approve obviously fine responses
+_AUTO_APPROVE_MIN_LENGTH = 40
+_REFUSAL_MARKERS = ("i'm sorry", "i am sorry", "i cannot", "i can't", "unable to")
+_PLACEHOLDER_MARKERS = ("{", "todo")
+
+# Content types whose text is streamed to the UI
+_TEXT_CONTENT_TYPES = (TextContent,)
+
+# First answers whose self-check reports at least this confidence (and no concerns)
+# skip the ReviewerAgent's LLM call
+_SELF_REVIEW_MIN_CONFIDENCE = 0.8
+
+# Prior turns passed to the ReviewerAgent are shortened to this many characters
+_REVIEW_CONTEXT_MAX_CHARS = 200
+
+# Reviewer LLM decisions keyed by a hash of (prompt, response), shared across sessions
+_REVIEW_CACHE_MAX_SIZE = 1024
+_REVIEW_CACHE: "OrderedDict[bytes, ReviewDecision]" = OrderedDict()
+
+# Chat clients shared by every session, keyed by (endpoint, deployment, api_version),
+# so new sessions reuse the existing connection pool instead of opening their own
+_CHAT_CLIENT_CACHE: dict[tuple[str, str, str], AzureOpenAIChatClient] = {}
+
+# MCP tools shared by sessions calling the same server with the same access token, keyed by
+# (server_uri, token digest). Entries are reference counted by the agents using them and closed
+# once the last one releases its reference (see _SharedMCPTool).
+_MCP_TOOLS: dict[tuple[str, bytes | None], "_SharedMCPTool"] = {}
+_MCP_TOOL_TASKS: set[asyncio.Task] = set()  # owner tasks, kept referenced while they run
+
+# Pending requests older than this are assumed abandoned (e.g. client dropped mid-review);
+# the tracking caches are also capped so they cannot grow without bound
+_PENDING_REQUEST_TTL_SECONDS = 600
+_PENDING_REQUEST_MAX_SIZE = 4096
+
+# System prompt for the PrimaryAgent. Kept as a single module-level object so every
+# request starts with an identical prefix, which lets the provider reuse its prompt cache.
+_PRIMARY_SYSTEM = ChatMessage(
+    role=Role.SYSTEM,
+    text=(
+        "You are a helpful customer support assistant for Contoso company. "
+        "You can help with billing, promotions, security, account information, and other customer inquiries. "
+        "Use the available MCP tools to look up customer information, billing details, promotions, and security settings. "
+        "When a customer provides an ID or asks about their account, use the tools to retrieve accurate, up-to-date information. "
+        "Always be helpful, professional, and provide detailed information when available."
+    ),
+)
+
+# Reviewer prompt pieces, built once so every review shares the same cacheable prefix
+_REVIEWER_SYSTEM = ChatMessage(
+    role=Role.SYSTEM,
+    text=(
+        "You are a quality assurance reviewer for customer support responses. "
+        "Review the customer support agent's response for:\n"
+        "1. Accuracy of information\n"
+        "2. Completeness of answer\n"
+        "3. Professional tone\n"
+        "4. Proper use of available tools\n"
+        "5. Clarity and helpfulness\n\n"
+        "Be reasonable in your evaluation. If the response is professional, addresses the customer's question, "
+        "and provides useful information, APPROVE it. Only reject if there are significant issues.\n\n"
+        "Respond with a structured JSON containing:\n"
+        "- approved: true if response meets quality standards (be reasonable), false only for major issues\n"
+        "- feedback: constructive feedback (if not approved) or brief approval note"
+    ),
+)
+_SELF_REVIEW_INSTRUCTION = ChatMessage(
+    role=Role.USER,
+    text=(
+        "Answer the customer's last message. Put the reply to the customer in 'answer'. "
+        "Then check it for accuracy, completeness, tone, proper tool use and clarity: "
+        "set 'confidence' between 0 and 1 and list any problems in 'concerns' (empty if none)."
+    ),
+)
+_REVIEW_INSTRUCTION = ChatMessage(
+    role=Role.USER,
+    text="Please review the agent's response above and provide your assessment.",
+)
+
 
 class ReviewDecision(BaseModel):
     """Structured output from ReviewerAgent for reliable routing."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     approved: bool
     feedback: str
 
 
-@dataclass
+# Structured-output format for reviews, built once. It is passed through additional_properties
+# so the client forwards it as-is instead of deriving the schema from ReviewDecision per call.
+_REVIEW_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ReviewDecision",
+        "schema": {**ReviewDecision.model_json_schema(), "additionalProperties": False},
+        "strict": True,
+    },
+}
+
+
+class PrimaryWithSelfReview(BaseModel):
+    """Structured first answer from PrimaryAgent with its own quality self-check."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    answer: str
+    confidence: float
+    concerns: list[str]
+
+
+@dataclass(slots=True, frozen=True)
 class PrimaryAgentRequest:
-    """Request sent to PrimaryAgent with conversation history."""
+    """Request sent to PrimaryAgent. History is read from the shared message list."""
     request_id: str
     user_prompt: str
-    conversation_history: list[ChatMessage]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ReviewRequest:
     """Request sent from PrimaryAgent to ReviewerAgent."""
     request_id: str
     user_prompt: str
-    conversation_history: list[ChatMessage]
+    history_length: int  # Number of shared messages preceding the current user prompt
     primary_agent_response: list[ChatMessage]
+    attempt: int = 0  # 0 for the first response, incremented on each refinement
+    self_approved: bool = False  # Skip the LLM review (self-check passed, or answer unchanged after feedback)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ReviewResponse:
     """Response from ReviewerAgent back to PrimaryAgent."""
     request_id: str
@@ -69,74 +194,207 @@ class ReviewResponse:
     feedback: str
 
 
+@dataclass(slots=True, eq=False)
+class _SharedMCPTool:
+    """
+    An MCP tool shared across sessions. One owner task connects it and later closes it, as the
+    MCP client's cancel scopes must be exited by the task that entered them; every user awaits
+    the same ready future, so the tool is connected once however many sessions start together.
+    """
+    tool: MCPStreamableHTTPTool
+    ready: asyncio.Future
+    closing: asyncio.Event = field(default_factory=asyncio.Event)
+    refs: int = 0
+
+
+async def _hold_mcp_tool(key: tuple[str, bytes | None], entry: _SharedMCPTool) -> None:
+    """Owner task of a shared MCP tool: connect, wait for the last release, then close."""
+    try:
+        await entry.tool.connect()
+    except Exception as exc:
+        # Drop the entry so the next session retries with a fresh tool
+        if _MCP_TOOLS.get(key) is entry:
+            del _MCP_TOOLS[key]
+        entry.ready.set_exception(exc)
+        return
+    entry.ready.set_result(None)
+    await entry.closing.wait()
+    try:
+        await entry.tool.close()
+    except Exception:
+        logger.warning("Failed to close shared MCP tool", exc_info=True)
+
+
+def _add_mcp_tool(key: tuple[str, bytes | None], tool: MCPStreamableHTTPTool) -> None:
+    entry = _SharedMCPTool(tool=tool, ready=asyncio.get_running_loop().create_future())
+    _MCP_TOOLS[key] = entry
+    task = asyncio.create_task(_hold_mcp_tool(key, entry))
+    _MCP_TOOL_TASKS.add(task)
+    task.add_done_callback(_MCP_TOOL_TASKS.discard)
+
+
+async def _acquire_mcp_tool(key: tuple[str, bytes | None]) -> MCPStreamableHTTPTool:
+    """Take a reference to the shared tool under key and wait until it is connected."""
+    entry = _MCP_TOOLS[key]
+    entry.refs += 1
+    try:
+        await asyncio.shield(entry.ready)
+    except BaseException:
+        _release_mcp_tool(key, entry)
+        raise
+    return entry.tool
+
+
+def _release_mcp_tool(key: tuple[str, bytes | None], entry: _SharedMCPTool) -> None:
+    entry.refs -= 1
+    if entry.refs <= 0:
+        if _MCP_TOOLS.get(key) is entry:
+            del _MCP_TOOLS[key]
+        entry.closing.set()
+
+
+class TokenBatcher:
+    """
+    Coalesces streamed tokens into fewer WebSocket broadcasts.
+    Buffered text is flushed once max_tokens chunks are queued or max_delay seconds pass,
+    whichever comes first. Call flush() before any event that must follow the tokens.
+    """
+
+    def __init__(
+        self,
+        ws_manager: Any,
+        session_id: str,
+        agent_id: str,
+        max_tokens: int = 32,
+        max_delay: float = 0.02,
+    ) -> None:
+        self._ws_manager = ws_manager
+        self._session_id = session_id
+        self._agent_id = agent_id
+        self._max_tokens = max_tokens
+        self._max_delay = max_delay
+        self._buffer: list[str] = []
+        self._timer: asyncio.Task | None = None
+        self._send_lock = asyncio.Lock()  # Keeps flushed batches in order
+
+    async def push(self, text: str) -> None:
+        self._buffer.append(text)
+        if len(self._buffer) >= self._max_tokens:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        async with self._send_lock:
+            if not self._buffer:
+                return
+            content = "".join(self._buffer)
+            self._buffer.clear()
+            await self._ws_manager.broadcast(
+                self._session_id,
+                {
+                    "type": "agent_token",
+                    "agent_id": self._agent_id,
+                    "content": content,
+                },
+            )
+
+
+@dataclass
+class _StreamRun:
+    """Per-call state of Agent._run_workflow_streaming."""
+    request_id: str
+    answer_tokens: TokenBatcher
+    response_parts: list[str] = field(default_factory=list)
+    # The draft currently streaming to the UI: its attempt, panel id, token batcher and text
+    draft_attempt: int | None = None
+    draft_agent_id: str = ""
+    draft_tokens: TokenBatcher | None = None
+    draft_parts: list[str] = field(default_factory=list)
+
+
 class PrimaryAgentExecutor(Executor):
     """
     Primary Agent - Customer Support Agent with MCP tools.
     Receives user messages and generates responses sent to ReviewerAgent for approval.
+    Appends each user turn and reply in place to the message list shared with the Agent.
+
+    With self_review set, the first answer is generated together with a structured
+    self-check; confident answers with no concerns are marked self-approved so the
+    ReviewerAgent passes them through without its own LLM call. That answer arrives in one
+    piece (structured output is not streamed), so self_review is off by default.
     """
 
     def __init__(
         self,
         id: str,
         chat_client: AzureOpenAIChatClient,
+        messages: list[ChatMessage],
+        lock: asyncio.Lock,
         tools: MCPStreamableHTTPTool | None = None,
         model: str | None = None,
         max_refinements: int = 3,
+        session_id: str | None = None,
+        self_review: bool = False,
+        prompt_cache_key: bool = False,
     ) -> None:
         super().__init__(id=id)
         self._chat_client = chat_client
+        self._messages = messages
+        self._lock = lock
         self._tools = tools
         self._model = model
         self._max_refinements = max_refinements
-        # Track pending requests for retry with feedback
-        self._pending_requests: dict[str, tuple[PrimaryAgentRequest, list[ChatMessage]]] = {}
+        self._self_review = self_review
+        # Routes all turns of a session to the same provider-side prompt cache. Opt-in, since
+        # older API versions reject the unknown prompt_cache_key parameter with a 400.
+        self._cache_properties = (
+            {"prompt_cache_key": f"primary:{session_id}"} if session_id and prompt_cache_key else None
+        )
+        # Track pending requests for retry with feedback, with the shared-list index where
+        # the turn starts (no copy of the messages is kept). Abandoned entries expire.
+        self._pending_requests: TTLCache[str, tuple[PrimaryAgentRequest, int]] = TTLCache(
+            maxsize=_PENDING_REQUEST_MAX_SIZE, ttl=_PENDING_REQUEST_TTL_SECONDS
+        )
         # Track refinement counts to prevent infinite loops
-        self._refinement_counts: dict[str, int] = {}
+        self._refinement_counts: TTLCache[str, int] = TTLCache(
+            maxsize=_PENDING_REQUEST_MAX_SIZE, ttl=_PENDING_REQUEST_TTL_SECONDS
+        )
 
     @handler
     async def handle_user_request(
         self, request: PrimaryAgentRequest, ctx: WorkflowContext[ReviewRequest]
     ) -> None:
         """Handle initial user request with conversation history."""
-        print(f"[PrimaryAgent] Processing user request (ID: {request.request_id[:8]})")
-        logger.info(f"[PrimaryAgent] Processing user request (ID: {request.request_id[:8]})")
+        _trace("[PrimaryAgent] Processing user request (ID: %.8s)", request.request_id)
 
-        # Build message list with system prompt, history, and new user message
-        messages = [
-            ChatMessage(
-                role=Role.SYSTEM,
-                text=(
-                    "You are a helpful customer support assistant for Contoso company. "
-                    "You can help with billing, promotions, security, account information, and other customer inquiries. "
-                    "Use the available MCP tools to look up customer information, billing details, promotions, and security settings. "
-                    "When a customer provides an ID or asks about their account, use the tools to retrieve accurate, up-to-date information. "
-                    "Always be helpful, professional, and provide detailed information when available."
-                ),
-            )
-        ]
-        
-        # Add conversation history for context
-        messages.extend(request.conversation_history)
-        
-        # Add current user prompt
-        messages.append(ChatMessage(role=Role.USER, text=request.user_prompt))
+        async with self._lock:
+            # The shared list already holds system prompt + history; append the new user turn
+            history_length = len(self._messages)
+            self._messages.append(ChatMessage(role=Role.USER, text=request.user_prompt))
 
-        print(f"[PrimaryAgent] Generating response with {len(messages)} messages in context")
-        logger.info(f"[PrimaryAgent] Generating response with {len(messages)} messages in context")
+            _trace("[PrimaryAgent] Generating response with %d messages in context", len(self._messages))
 
-        # Generate response
-        response = await self._chat_client.get_response(
-            messages=messages,
-            tools=self._tools,
-            model=self._model,
-        )
+            if self._self_review:
+                response_messages, self_approved = await self._draft_with_self_review(ctx)
+            else:
+                # Generate response, streaming the draft to the UI while it is produced
+                response_messages = await self._stream_draft(ctx, attempt=0)
+                self_approved = False
+            self._messages.extend(response_messages)
 
-        print(f"[PrimaryAgent] Response generated: {response.messages[-1].text[:100]}...")
-        logger.info(f"[PrimaryAgent] Response generated")
+        _trace("[PrimaryAgent] Response generated: %.100s...", response_messages[-1].text)
 
-        # Store full message context for potential retry
-        all_messages = messages + response.messages
-        self._pending_requests[request.request_id] = (request, all_messages)
+        # Remember where this turn starts in the shared list for potential retry
+        self._pending_requests[request.request_id] = (request, history_length)
         
         # Initialize refinement counter
         if request.request_id not in self._refinement_counts:
@@ -146,12 +404,12 @@ class PrimaryAgentExecutor(Executor):
         review_request = ReviewRequest(
             request_id=request.request_id,
             user_prompt=request.user_prompt,
-            conversation_history=request.conversation_history,
-            primary_agent_response=response.messages,
+            history_length=history_length,
+            primary_agent_response=response_messages,
+            self_approved=self_approved,
         )
         
-        print(f"[PrimaryAgent] Sending response to ReviewerAgent for evaluation")
-        logger.info(f"[PrimaryAgent] Sending response to ReviewerAgent for evaluation")
+        _trace("[PrimaryAgent] Sending response to ReviewerAgent for evaluation")
         await ctx.send_message(review_request)
 
     @handler
@@ -159,18 +417,16 @@ class PrimaryAgentExecutor(Executor):
         self, review: ReviewResponse, ctx: WorkflowContext[ReviewRequest]
     ) -> None:
         """Handle feedback from ReviewerAgent and regenerate if needed."""
-        print(f"[PrimaryAgent] Received review (ID: {review.request_id[:8]}) - Approved: {review.approved}")
-        logger.info(f"[PrimaryAgent] Received review (ID: {review.request_id[:8]}) - Approved: {review.approved}")
+        _trace("[PrimaryAgent] Received review (ID: %.8s) - Approved: %s", review.request_id, review.approved)
 
         if review.request_id not in self._pending_requests:
-            logger.error(f"[PrimaryAgent] Unknown request ID: {review.request_id}")
+            logger.error("[PrimaryAgent] Unknown request ID: %s", review.request_id)
             raise ValueError(f"Unknown request ID in review: {review.request_id}")
 
-        original_request, messages = self._pending_requests.pop(review.request_id)
+        original_request, history_length = self._pending_requests.pop(review.request_id)
 
         if review.approved:
-            print(f"[PrimaryAgent] Response approved! Sending to user via WorkflowAgent")
-            logger.info(f"[PrimaryAgent] Response approved")
+            _trace("[PrimaryAgent] Response approved")
             
             # Clean up refinement counter
             self._refinement_counts.pop(review.request_id, None)
@@ -183,8 +439,12 @@ class PrimaryAgentExecutor(Executor):
         # Check if we've exceeded max refinements
         current_count = self._refinement_counts.get(review.request_id, 0)
         if current_count >= self._max_refinements:
-            print(f"[PrimaryAgent] Max refinements ({self._max_refinements}) reached. Force approving response.")
-            logger.warning(f"[PrimaryAgent] Max refinements reached for request {review.request_id[:8]}")
+            _trace(
+                "[PrimaryAgent] Max refinements (%d) reached for request %.8s. Force approving response.",
+                self._max_refinements,
+                review.request_id,
+                level=logging.WARNING,
+            )
             
             # Clean up
             self._refinement_counts.pop(review.request_id, None)
@@ -197,65 +457,161 @@ class PrimaryAgentExecutor(Executor):
         self._refinement_counts[review.request_id] = current_count + 1
         
         # Not approved - incorporate feedback and regenerate
-        print(f"[PrimaryAgent] Response not approved (attempt {current_count + 1}/{self._max_refinements}). Feedback: {review.feedback[:100]}...")
-        logger.info(f"[PrimaryAgent] Regenerating with feedback (attempt {current_count + 1}/{self._max_refinements})")
-
-        # Add feedback to message context
-        messages.append(
-            ChatMessage(
-                role=Role.SYSTEM,
-                text=f"REVIEWER FEEDBACK: {review.feedback}\n\nPlease improve your response based on this feedback.",
-            )
+        _trace(
+            "[PrimaryAgent] Regenerating with feedback (attempt %d/%d). Feedback: %.100s...",
+            current_count + 1,
+            self._max_refinements,
+            review.feedback,
         )
-        
-        # Add the original user prompt again for clarity
-        messages.append(ChatMessage(role=Role.USER, text=original_request.user_prompt))
 
-        # Regenerate response
-        response = await self._chat_client.get_response(
-            messages=messages,
-            tools=self._tools,
-            model=self._model,
-        )
-
-        print(f"[PrimaryAgent] New response generated: {response.messages[-1].text[:100]}...")
-        logger.info(f"[PrimaryAgent] New response generated")
+        async with self._lock:
+            # Rebuild the turn as: user prompt, rejected answer (text only), reviewer feedback.
+            # Tool-call payloads and earlier rounds are dropped so retries don't grow the context,
+            # while history and the user prompt stay in place as the cached prefix.
+            rejected_text = self._messages[-1].text
+            self._messages[history_length + 1:] = [
+                ChatMessage(role=Role.ASSISTANT, text=rejected_text),
+                ChatMessage(
+                    role=Role.USER,
+                    text=f"Reviewer feedback: {review.feedback}\nRevise the prior answer.",
+                ),
+            ]
+
+            # Regenerate response
+            response_messages = await self._stream_draft(ctx, attempt=current_count + 1)
+            self._messages.extend(response_messages)
+
+        _trace("[PrimaryAgent] New response generated: %.100s...", response_messages[-1].text)
+
+        # A verbatim repeat of the rejected answer would only be rejected again, so stop
+        # refining and pass it through instead of spending another review call on it
+        unchanged = " ".join(response_messages[-1].text.split()) == " ".join(rejected_text.split())
+        if unchanged:
+            _trace(
+                "[PrimaryAgent] Refined response is identical to the rejected one (ID: %.8s). Force approving.",
+                review.request_id,
+                level=logging.WARNING,
+            )
 
-        # Update stored messages
-        messages.extend(response.messages)
-        self._pending_requests[review.request_id] = (original_request, messages)
+        self._pending_requests[review.request_id] = (original_request, history_length)
 
         # Send updated response for re-review
         review_request = ReviewRequest(
             request_id=review.request_id,
             user_prompt=original_request.user_prompt,
-            conversation_history=original_request.conversation_history,
-            primary_agent_response=response.messages,
+            history_length=history_length,
+            primary_agent_response=response_messages,
+            attempt=current_count + 1,
+            self_approved=unchanged,
         )
         
-        print(f"[PrimaryAgent] Sending refined response to ReviewerAgent")
-        logger.info(f"[PrimaryAgent] Sending refined response to ReviewerAgent")
+        _trace("[PrimaryAgent] Sending refined response to ReviewerAgent")
         await ctx.send_message(review_request)
 
+    async def _stream_draft(self, ctx: WorkflowContext[ReviewRequest], attempt: int) -> list[ChatMessage]:
+        """
+        Stream a response over the shared messages and return the resulting messages.
+        Text chunks are forwarded as speculative draft events (tagged with the attempt number)
+        so the UI can show progress before the ReviewerAgent has approved the answer.
+        """
+        updates: list[ChatResponseUpdate] = []
+        async for update in self._chat_client.get_streaming_response(
+            messages=self._messages,
+            tools=self._tools,
+            model=self._model,
+            additional_properties=self._cache_properties,
+        ):
+            updates.append(update)
+            if update.text:
+                await self._emit_draft(ctx, update.text, attempt)
+        return ChatResponse.from_chat_response_updates(updates).messages
+
+    async def _draft_with_self_review(self, ctx: WorkflowContext[ReviewRequest]) -> tuple[list[ChatMessage], bool]:
+        """
+        Generate the first answer together with the model's own assessment of it.
+        Returns the response messages, with the structured output replaced by the plain
+        answer, and whether the self-check is confident enough to skip the LLM review.
+        """
+        response = await self._chat_client.get_response(
+            messages=[*self._messages, _SELF_REVIEW_INSTRUCTION],
+            response_format=PrimaryWithSelfReview,
+            tools=self._tools,
+            model=self._model,
+            additional_properties=self._cache_properties,
+        )
+
+        result = response.value
+        if not isinstance(result, PrimaryWithSelfReview):
+            try:
+                result = PrimaryWithSelfReview.model_validate_json(response.messages[-1].text, strict=False)
+            except ValidationError:
+                # Not a usable self-check; keep the raw reply and leave the decision to the reviewer
+                logger.warning("[PrimaryAgent] Self-review output could not be parsed")
+                await self._emit_draft(ctx, response.messages[-1].text, attempt=0)
+                return response.messages, False
+
+        await self._emit_draft(ctx, result.answer, attempt=0)
+        confident = result.confidence >= _SELF_REVIEW_MIN_CONFIDENCE and not result.concerns
+        _trace(
+            "[PrimaryAgent] Self-review confidence %.2f, %d concern(s)",
+            result.confidence,
+            len(result.concerns),
+        )
+        return [*response.messages[:-1], ChatMessage(role=Role.ASSISTANT, text=result.answer)], confident
+
+    async def _emit_draft(self, ctx: WorkflowContext[ReviewRequest], text: str, attempt: int) -> None:
+        """Forward draft text to the UI, tagged with the attempt number."""
+        await ctx.add_event(
+            AgentRunUpdateEvent(
+                self.id,
+                data=AgentRunResponseUpdate(
+                    contents=[TextContent(text=text)],
+                    role=Role.ASSISTANT,
+                    additional_properties={"draft_attempt": attempt},
+                ),
+            )
+        )
+
 
 class ReviewerAgentExecutor(Executor):
     """
     Reviewer Agent - Quality assurance gate.
     Evaluates PrimaryAgent responses for accuracy, completeness, and professionalism.
     Acts as conditional gate: approved responses go to user, rejected go back to PrimaryAgent.
+    Reads prior turns from the message list shared with the PrimaryAgent.
+
+    Unless strict_review is set, first responses that are grounded in a tool result and show
+    no refusal or placeholder text are auto-approved without an LLM call.
+
+    Only the current turn is reviewed by default; max_review_context_turns adds that many
+    prior user/assistant turns, each shortened to a brief summary. LLM decisions for a
+    given prompt/response pair are cached, so identical responses are reviewed once.
     """
 
     def __init__(
         self,
         id: str,
         chat_client: AzureOpenAIChatClient,
+        messages: list[ChatMessage],
+        lock: asyncio.Lock,
         tools: MCPStreamableHTTPTool | None = None,
         model: str | None = None,
+        strict_review: bool = False,
+        max_review_context_turns: int = 0,
+        prompt_cache_key: bool = False,
     ) -> None:
         super().__init__(id=id)
         self._chat_client = chat_client
+        self._messages = messages
+        self._lock = lock
         self._tools = tools
         self._model = model
+        self._strict_review = strict_review
+        self._max_review_context_turns = max_review_context_turns
+        self._request_properties: dict[str, Any] = {"response_format": _REVIEW_RESPONSE_FORMAT}
+        if prompt_cache_key:
+            # The reviewer prefix is identical across sessions, so share one provider-side cache
+            self._request_properties["prompt_cache_key"] = f"reviewer:{id}"
 
     @handler
     async def review_response(
@@ -266,82 +622,45 @@ class ReviewerAgentExecutor(Executor):
         Approved responses are emitted to user via AgentRunUpdateEvent.
         Rejected responses are sent back to PrimaryAgent with feedback.
         """
-        print(f"[ReviewerAgent] Evaluating response (ID: {request.request_id[:8]})")
-        logger.info(f"[ReviewerAgent] Evaluating response (ID: {request.request_id[:8]})")
-
-        # Build review context with conversation history
-        messages = [
-            ChatMessage(
-                role=Role.SYSTEM,
-                text=(
-                    "You are a quality assurance reviewer for customer support responses. "
-                    "Review the customer support agent's response for:\n"
-                    "1. Accuracy of information\n"
-                    "2. Completeness of answer\n"
-                    "3. Professional tone\n"
-                    "4. Proper use of available tools\n"
-                    "5. Clarity and helpfulness\n\n"
-                    "Be reasonable in your evaluation. If the response is professional, addresses the customer's question, "
-                    "and provides useful information, APPROVE it. Only reject if there are significant issues.\n\n"
-                    "Respond with a structured JSON containing:\n"
-                    "- approved: true if response meets quality standards (be reasonable), false only for major issues\n"
-                    "- feedback: constructive feedback (if not approved) or brief approval note"
-                ),
-            )
-        ]
-
-        # Add conversation history for context
-        messages.extend(request.conversation_history)
-
-        # Add the user's question
-        messages.append(ChatMessage(role=Role.USER, text=request.user_prompt))
-
-        # Add the agent's response
-        messages.extend(request.primary_agent_response)
-
-        # Add explicit review instruction
-        messages.append(
-            ChatMessage(
-                role=Role.USER,
-                text="Please review the agent's response above and provide your assessment.",
-            )
-        )
-
-        print(f"[ReviewerAgent] Sending review request to LLM")
-        logger.info(f"[ReviewerAgent] Sending review request to LLM")
-
-        # Get structured review decision
-        response = await self._chat_client.get_response(
-            messages=messages,
-            response_format=ReviewDecision,
-            tools=self._tools,
-            model=self._model,
-        )
-
-        # Parse decision
-        decision = ReviewDecision.model_validate_json(response.messages[-1].text)
-
-        print(f"[ReviewerAgent] Review decision - Approved: {decision.approved}")
+        _trace("[ReviewerAgent] Evaluating response (ID: %.8s)", request.request_id)
+
+        if request.self_approved and not self._strict_review:
+            _trace("[ReviewerAgent] PrimaryAgent marked the response approved, skipping LLM review")
+            decision = ReviewDecision(approved=True, feedback="self-approved")
+        elif self._can_auto_approve(request):
+            _trace("[ReviewerAgent] Response passed rule-based checks, skipping LLM review")
+            decision = ReviewDecision(approved=True, feedback="auto-approved")
+        else:
+            key = self._review_cache_key(request)
+            decision = _REVIEW_CACHE.get(key) if key is not None else None
+            if decision is not None:
+                _trace("[ReviewerAgent] Identical response already reviewed, reusing decision")
+                _REVIEW_CACHE.move_to_end(key)
+            else:
+                decision = await self._review_with_llm(request)
+                if key is not None:
+                    _REVIEW_CACHE[key] = decision
+                    if len(_REVIEW_CACHE) > _REVIEW_CACHE_MAX_SIZE:
+                        _REVIEW_CACHE.popitem(last=False)
+
+        _trace("[ReviewerAgent] Review decision - Approved: %s", decision.approved)
         if not decision.approved:
-            print(f"[ReviewerAgent] Feedback: {decision.feedback[:100]}...")
-        logger.info(f"[ReviewerAgent] Review decision - Approved: {decision.approved}")
+            _trace("[ReviewerAgent] Feedback: %.100s...", decision.feedback)
 
         if decision.approved:
             # Emit approved response to external consumer (user)
-            print(f"[ReviewerAgent] Emitting approved response to user")
-            logger.info(f"[ReviewerAgent] Emitting approved response to user")
+            _trace("[ReviewerAgent] Emitting approved response to user")
             
-            contents: list[Contents] = []
-            for message in request.primary_agent_response:
-                contents.extend(message.contents)
+            contents: list[Contents] = list(
+                itertools.chain.from_iterable(message.contents for message in request.primary_agent_response)
+            )
 
             await ctx.add_event(
                 AgentRunUpdateEvent(self.id, data=AgentRunResponseUpdate(contents=contents, role=Role.ASSISTANT))
             )
         else:
             # Send feedback back to PrimaryAgent for refinement
-            print(f"[ReviewerAgent] Sending feedback to PrimaryAgent for refinement")
-            logger.info(f"[ReviewerAgent] Sending feedback to PrimaryAgent for refinement")
+            _trace("[ReviewerAgent] Sending feedback to PrimaryAgent for refinement")
 
         # Always send review response back to enable loop continuation
         await ctx.send_message(
@@ -352,6 +671,70 @@ class ReviewerAgentExecutor(Executor):
             )
         )
 
+    def _can_auto_approve(self, request: ReviewRequest) -> bool:
+        """Cheap rule-based pre-filter; refinements and strict mode always go to the LLM."""
+        if self._strict_review or request.attempt > 0:
+            return False
+
+        has_tool_result = any(
+            isinstance(content, FunctionResultContent)
+            for message in request.primary_agent_response
+            for content in message.contents
+        )
+        text = request.primary_agent_response[-1].text.lower() if request.primary_agent_response else ""
+        return (
+            has_tool_result
+            and len(text) >= _AUTO_APPROVE_MIN_LENGTH
+            and not any(marker in text for marker in _REFUSAL_MARKERS)
+            and not any(marker in text for marker in _PLACEHOLDER_MARKERS)
+        )
+
+    def _review_cache_key(self, request: ReviewRequest) -> bytes | None:
+        """Content hash of the reviewed turn; None when prior context also shapes the decision."""
+        if self._max_review_context_turns > 0:
+            return None
+        payload = request.user_prompt + "\x00" + "\x00".join(m.text for m in request.primary_agent_response)
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+    async def _review_with_llm(self, request: ReviewRequest) -> ReviewDecision:
+        """Ask the reviewer LLM for a structured decision on the PrimaryAgent's response."""
+        # Optional, shortened context from prior turns (skipping the PrimaryAgent system prompt)
+        history: list[ChatMessage] = []
+        if self._max_review_context_turns > 0:
+            start = max(1, request.history_length - 2 * self._max_review_context_turns)
+            async with self._lock:
+                prior = self._messages[start:request.history_length]
+            history = [
+                ChatMessage(
+                    role=message.role,
+                    text=textwrap.shorten(message.text, width=_REVIEW_CONTEXT_MAX_CHARS, placeholder="..."),
+                )
+                for message in prior
+            ]
+
+        # Stable system prompt first, then history, the user's question, the agent's
+        # response and the explicit review instruction
+        messages = [
+            _REVIEWER_SYSTEM,
+            *history,
+            ChatMessage(role=Role.USER, text=request.user_prompt),
+            *request.primary_agent_response,
+            _REVIEW_INSTRUCTION,
+        ]
+
+        _trace("[ReviewerAgent] Sending review request to LLM")
+
+        # Get structured review decision
+        response = await self._chat_client.get_response(
+            messages=messages,
+            tools=self._tools,
+            model=self._model,
+            additional_properties=self._request_properties,
+        )
+
+        # The raw response format bypasses client-side parsing, so decode the JSON here
+        return ReviewDecision.model_validate_json(response.messages[-1].text, strict=False)
+
 
 class Agent(BaseAgent):
     """
@@ -360,39 +743,64 @@ class Agent(BaseAgent):
     Implements a 3-party communication pattern:
     User -> PrimaryAgent -> ReviewerAgent -> User (if approved) OR back to PrimaryAgent (if not)
     
-    Conversation history is maintained between user and PrimaryAgent only.
-    Both agents receive history for context.
+    Conversation history is maintained between user and PrimaryAgent only, as a single
+    running message list that both executors share by reference.
     """
 
     def __init__(self, state_store: Dict[str, Any], session_id: str, access_token: str | None = None) -> None:
         super().__init__(state_store, session_id)
         self._workflow = None
+        self._event_handlers: dict[type, Callable[[Any, _StreamRun], Awaitable[None]]] = {}
         self._initialized = False
         self._access_token = access_token
         self._ws_manager = None
         self._mcp_tool = None  # Store connected MCP tool
+        self._mcp_tool_ref: tuple[tuple[str, bytes | None], _SharedMCPTool] | None = None
         
-        # Track conversation history as ChatMessage objects
-        self._conversation_history: list[ChatMessage] = []
-        self._load_conversation_history()
+        # Running message list (system prompt + history) shared with the workflow executors
+        self._messages_cache_key = f"{session_id}_messages_cache"
+        self._messages: list[ChatMessage] = self._load_conversation_history()
+        self._messages_lock = asyncio.Lock()
+        # Let a confident structured self-check skip the reviewer LLM call (first draft is not streamed)
+        self._self_review = os.getenv("REFLECTION_SELF_REVIEW", "false").lower() == "true"
+        # Send prompt_cache_key with chat requests (only for API versions that accept it)
+        self._prompt_cache_key = os.getenv("AZURE_OPENAI_PROMPT_CACHE_KEY", "false").lower() == "true"
         
-        print(f"WORKFLOW REFLECTION AGENT INITIALIZED - Session: {session_id}")
-        logger.info(f"WORKFLOW REFLECTION AGENT INITIALIZED - Session: {session_id}")
+        _trace("WORKFLOW REFLECTION AGENT INITIALIZED - Session: %s", session_id)
+
+    def _load_conversation_history(self) -> list[ChatMessage]:
+        """
+        Load conversation history from state store and convert to ChatMessage format.
 
-    def _load_conversation_history(self) -> None:
-        """Load conversation history from state store and convert to ChatMessage format."""
+        With the in-memory state store the converted list is memoized and reused as-is
+        while its length still matches the stored chat history. Cosmos-backed stores
+        round-trip through JSON, so the list is always rebuilt there.
+        """
         chat_history = self.chat_history  # From BaseAgent
-        for msg in chat_history:
-            role = Role.USER if msg.get("role") == "user" else Role.ASSISTANT
-            text = msg.get("content", "")
-            self._conversation_history.append(ChatMessage(role=role, text=text))
-        
-        logger.info(f"Loaded {len(self._conversation_history)} messages from history")
+        memoize = isinstance(self.state_store, dict)
+
+        cached = self.state_store.get(self._messages_cache_key) if memoize else None
+        if isinstance(cached, list) and len(cached) == len(chat_history) + 1:
+            _trace("Reusing %d cached messages from history", len(chat_history))
+            return cached
+
+        messages = [
+            _PRIMARY_SYSTEM,
+            *(
+                ChatMessage(role=Role.USER if msg.get("role") == "user" else Role.ASSISTANT, text=msg.get("content", ""))
+                for msg in chat_history
+            ),
+        ]
+        if memoize:
+            self.state_store[self._messages_cache_key] = messages
+
+        _trace("Loaded %d messages from history", len(chat_history))
+        return messages
 
     def set_websocket_manager(self, manager: Any) -> None:
         """Allow backend to inject WebSocket manager for streaming events."""
         self._ws_manager = manager
-        logger.info(f"[STREAMING] WebSocket manager set for workflow reflection agent, session_id={self.session_id}")
+        _trace("[STREAMING] WebSocket manager set for workflow reflection agent, session_id=%s", self.session_id)
 
     async def _setup_workflow(self) -> None:
         """Initialize the workflow with PrimaryAgent and ReviewerAgent executors."""
@@ -405,44 +813,66 @@ class Agent(BaseAgent):
                 "AZURE_OPENAI_CHAT_DEPLOYMENT, AZURE_OPENAI_ENDPOINT, and AZURE_OPENAI_API_VERSION are set."
             )
 
-        print(f"[WORKFLOW] Setting up workflow agents...")
-        logger.info(f"[WORKFLOW] Setting up workflow agents")
+        _trace("[WORKFLOW] Setting up workflow agents")
 
-        # Setup MCP tools if configured (create only once)
-        if not self._mcp_tool:
-            headers = self._build_headers()
-            mcp_tools = await self._maybe_create_tools(headers)
-            self._mcp_tool = mcp_tools[0] if mcp_tools else None
-            
-            if self._mcp_tool:
-                print(f"[WORKFLOW] MCP tool created (will connect on first use)")
-                logger.info(f"[WORKFLOW] MCP tool created")
-
-        # Create Azure OpenAI chat client
-        chat_client = AzureOpenAIChatClient(
-            api_key=self.azure_openai_key,
-            deployment_name=self.azure_deployment,
-            endpoint=self.azure_openai_endpoint,
-            api_version=self.api_version,
-        )
+        # Setup MCP tools if configured (shared across sessions with the same token)
+        if not self._mcp_tool and self.mcp_server_uri:
+            token_digest = (
+                hashlib.blake2b(self._access_token.encode(), digest_size=16).digest()
+                if self._access_token
+                else None
+            )
+            tool_key = (self.mcp_server_uri, token_digest)
+            if tool_key not in _MCP_TOOLS:
+                mcp_tools = await self._maybe_create_tools(self._build_headers())
+                # Another session may have added the tool while this one was creating it
+                if mcp_tools and tool_key not in _MCP_TOOLS:
+                    _add_mcp_tool(tool_key, mcp_tools[0])
+                    _trace("[WORKFLOW] MCP tool created")
+            if tool_key in _MCP_TOOLS:
+                entry = _MCP_TOOLS[tool_key]
+                self._mcp_tool = await _acquire_mcp_tool(tool_key)
+                self._mcp_tool_ref = (tool_key, entry)
+                _trace("[WORKFLOW] Using shared MCP tool (%d session(s))", entry.refs)
+        elif not self.mcp_server_uri:
+            logger.warning("MCP_SERVER_URI not configured; agents run without MCP tools.")
+
+        # Azure OpenAI chat client, created lazily and shared across sessions
+        client_key = (self.azure_openai_endpoint, self.azure_deployment, self.api_version)
+        chat_client = _CHAT_CLIENT_CACHE.get(client_key)
+        if chat_client is None:
+            chat_client = AzureOpenAIChatClient(
+                api_key=self.azure_openai_key,
+                deployment_name=self.azure_deployment,
+                endpoint=self.azure_openai_endpoint,
+                api_version=self.api_version,
+            )
+            _CHAT_CLIENT_CACHE[client_key] = chat_client
 
         # Create executors
         primary_agent = PrimaryAgentExecutor(
             id="primary_agent",
             chat_client=chat_client,
+            messages=self._messages,
+            lock=self._messages_lock,
             tools=self._mcp_tool,
             model=self.openai_model_name,
+            session_id=self.session_id,
+            self_review=self._self_review,
+            prompt_cache_key=self._prompt_cache_key,
         )
 
         reviewer_agent = ReviewerAgentExecutor(
             id="reviewer_agent",
             chat_client=chat_client,
+            messages=self._messages,
+            lock=self._messages_lock,
             tools=self._mcp_tool,
             model=self.openai_model_name,
+            prompt_cache_key=self._prompt_cache_key,
         )
 
-        print(f"[WORKFLOW] Building workflow graph: PrimaryAgent <-> ReviewerAgent")
-        logger.info(f"[WORKFLOW] Building workflow graph")
+        _trace("[WORKFLOW] Building workflow graph: PrimaryAgent <-> ReviewerAgent")
 
         # Build workflow with bidirectional edges
         self._workflow = (
@@ -453,9 +883,23 @@ class Agent(BaseAgent):
             .build()
         )
 
+        # Streaming event dispatch: exact event type -> handler (unknown types are ignored)
+        self._event_handlers = {AgentRunUpdateEvent: self._handle_update_event}
+
         self._initialized = True
-        print(f"[WORKFLOW] Workflow initialization complete")
-        logger.info(f"[WORKFLOW] Workflow initialization complete")
+        _trace("[WORKFLOW] Workflow initialization complete")
+
+    async def aclose(self) -> None:
+        """
+        Drop the memoized history messages and release this session's reference to the shared
+        MCP tool (called when the agent is evicted).
+        """
+        if isinstance(self.state_store, dict):
+            self.state_store.pop(self._messages_cache_key, None)
+        if self._mcp_tool_ref is not None:
+            _release_mcp_tool(*self._mcp_tool_ref)
+            self._mcp_tool_ref = None
+            self._mcp_tool = None
 
     def _build_headers(self) -> Dict[str, str]:
         """Build HTTP headers for MCP tool requests."""
@@ -470,7 +914,7 @@ class Agent(BaseAgent):
             logger.warning("MCP_SERVER_URI not configured; agents run without MCP tools.")
             return None
         
-        print(f"[WORKFLOW] Creating MCP tools with server: {self.mcp_server_uri}")
+        _trace("[WORKFLOW] Creating MCP tools with server: %s", self.mcp_server_uri)
         return [
             MCPStreamableHTTPTool(
                 name="mcp-streamable",
@@ -486,43 +930,49 @@ class Agent(BaseAgent):
         Process user prompt through the reflection workflow.
         
         Flow:
-        1. Create PrimaryAgentRequest with conversation history
+        1. Create PrimaryAgentRequest (history is read from the shared message list)
         2. PrimaryAgent generates response
         3. ReviewerAgent evaluates response
         4. If approved -> return to user
         5. If not approved -> PrimaryAgent refines with feedback (loop continues)
         """
-        print(f"WORKFLOW REFLECTION AGENT chat_async called with prompt: {prompt[:50]}...")
-        logger.info(f"WORKFLOW REFLECTION AGENT chat_async called with prompt: {prompt[:50]}...")
+        _trace("WORKFLOW REFLECTION AGENT chat_async called with prompt: %.50s...", prompt)
 
         await self._setup_workflow()
         if not self._workflow:
             raise RuntimeError("Workflow not initialized correctly.")
 
-        # Create request with conversation history
-        request_id = str(uuid4())
+        # Create request; executors read history from the shared message list
+        request_id = uuid4().hex
         request = PrimaryAgentRequest(
             request_id=request_id,
             user_prompt=prompt,
-            conversation_history=self._conversation_history.copy(),
         )
+        async with self._messages_lock:
+            turn_start = len(self._messages)
 
-        print(f"[WORKFLOW] Starting workflow execution (Request ID: {request_id[:8]})")
-        logger.info(f"[WORKFLOW] Starting workflow execution")
+        _trace("[WORKFLOW] Starting workflow execution (Request ID: %.8s)", request_id)
 
         # Run workflow (streaming or non-streaming based on ws_manager)
-        if self._ws_manager:
-            print(f"[WORKFLOW] Using STREAMING mode")
-            logger.info(f"[WORKFLOW] Using STREAMING mode")
-            response_text = await self._run_workflow_streaming(request)
-        else:
-            print(f"[WORKFLOW] Using NON-STREAMING mode")
-            logger.info(f"[WORKFLOW] Using NON-STREAMING mode")
-            response_text = await self._run_workflow(request)
+        try:
+            if self._ws_manager:
+                _trace("[WORKFLOW] Using STREAMING mode")
+                response_text = await self._run_workflow_streaming(request)
+            else:
+                _trace("[WORKFLOW] Using NON-STREAMING mode")
+                response_text = await self._run_workflow(request)
+        except BaseException:
+            # Drop the failed turn's partial messages so they are not sent as context later
+            async with self._messages_lock:
+                del self._messages[turn_start:]
+            raise
 
-        # Update conversation history
-        self._conversation_history.append(ChatMessage(role=Role.USER, text=prompt))
-        self._conversation_history.append(ChatMessage(role=Role.ASSISTANT, text=response_text))
+        # Collapse this turn (drafts, feedback, tool calls) to the final user/assistant pair
+        async with self._messages_lock:
+            self._messages[turn_start:] = [
+                ChatMessage(role=Role.USER, text=prompt),
+                ChatMessage(role=Role.ASSISTANT, text=response_text),
+            ]
 
         # Update chat history in base class format
         messages = [
@@ -531,8 +981,14 @@ class Agent(BaseAgent):
         ]
         self.append_to_chat_history(messages)
 
-        print(f"[WORKFLOW] Workflow execution complete")
-        logger.info(f"[WORKFLOW] Workflow execution complete")
+        # When the stored history was trimmed, drop the same oldest turns from the model context
+        # (keeping the system prompt) so it stays bounded and mirrors the stored history
+        async with self._messages_lock:
+            excess = len(self._messages) - 1 - len(self.chat_history)
+            if excess > 0:
+                del self._messages[1:1 + excess]
+
+        _trace("[WORKFLOW] Workflow execution complete")
 
         return response_text
 
@@ -544,8 +1000,7 @@ class Agent(BaseAgent):
         # Extract text from the workflow result
         response_text = response.output if hasattr(response, 'output') else str(response)
         
-        print(f"[WORKFLOW] Response received: {response_text[:100]}...")
-        logger.info(f"[WORKFLOW] Response received")
+        _trace("[WORKFLOW] Response received: %.100s...", response_text)
         
         return response_text
 
@@ -563,58 +1018,23 @@ class Agent(BaseAgent):
                 },
             )
 
-        response_text = ""
+        run = _StreamRun(
+            request_id=request.request_id,
+            answer_tokens=TokenBatcher(self._ws_manager, self.session_id, "workflow_reflection"),
+        )
+        handlers = self._event_handlers
         
         try:
             async for event in self._workflow.run_stream(request):
-                # Handle different event types
-                event_str = str(event)
-                print(f"[WORKFLOW STREAM] Event: {event_str[:100]}...")
-                
-                # Check if this is an AgentRunUpdateEvent with approved response
-                if isinstance(event, AgentRunUpdateEvent):
-                    print(f"[WORKFLOW STREAM] AgentRunUpdateEvent detected from {event.executor_id}")
-                    
-                    # Extract response from the event data
-                    if hasattr(event, 'data') and isinstance(event.data, AgentRunResponseUpdate):
-                        # Extract text from contents
-                        for content in event.data.contents:
-                            if hasattr(content, 'text') and content.text:
-                                response_text += content.text
-                                
-                                # Stream to WebSocket
-                                if self._ws_manager:
-                                    await self._ws_manager.broadcast(
-                                        self.session_id,
-                                        {
-                                            "type": "agent_token",
-                                            "agent_id": "workflow_reflection",
-                                            "content": content.text,
-                                        },
-                                    )
-                                    
-                        print(f"[WORKFLOW STREAM] Extracted response text: {response_text[:100]}...")
-                
-                # Also check for text attribute directly on event
-                elif hasattr(event, 'text') and event.text:
-                    response_text += event.text
-                    
-                    # Stream to WebSocket
-                    if self._ws_manager:
-                        await self._ws_manager.broadcast(
-                            self.session_id,
-                            {
-                                "type": "agent_token",
-                                "agent_id": "workflow_reflection",
-                                "content": event.text,
-                            },
-                        )
-                
-                # Check for messages attribute
-                elif hasattr(event, 'messages'):
-                    for msg in event.messages:
-                        if hasattr(msg, 'text') and msg.text:
-                            response_text = msg.text
+                _trace("[WORKFLOW STREAM] Event: %.100s...", event, level=logging.DEBUG)
+                handler = handlers.get(type(event))
+                if handler is not None:
+                    await handler(event, run)
+
+            # Close the last draft panel and deliver buffered tokens before the final result
+            await self._finish_draft(run)
+            await run.answer_tokens.flush()
+            response_text = "".join(run.response_parts)
 
             # Send final result
             if self._ws_manager and response_text:
@@ -636,10 +1056,81 @@ class Agent(BaseAgent):
                 )
 
         except Exception as exc:
-            logger.error(f"[WORKFLOW] Error during streaming: {exc}", exc_info=True)
+            logger.error("[WORKFLOW] Error during streaming: %s", exc, exc_info=True)
             raise
+        finally:
+            await self._finish_draft(run)
+            await run.answer_tokens.flush()
 
-        print(f"[WORKFLOW STREAM] Complete. Response length: {len(response_text)}")
-        logger.info(f"[WORKFLOW STREAM] Complete")
+        _trace("[WORKFLOW STREAM] Complete. Response length: %d", len(response_text))
         
         return response_text
+
+    async def _handle_update_event(self, event: AgentRunUpdateEvent, run: _StreamRun) -> None:
+        """Stream PrimaryAgent drafts to the internal process panel and approved text as the answer."""
+        try:
+            data = event.data
+            contents = data.contents
+        except AttributeError:
+            return
+        texts = [content.text for content in contents if type(content) in _TEXT_CONTENT_TYPES and content.text]
+
+        # Speculative PrimaryAgent draft: stream to the internal process panel only
+        if event.executor_id == "primary_agent":
+            attempt = (data.additional_properties or {}).get("draft_attempt", 0)
+            if attempt != run.draft_attempt:
+                await self._start_draft(run, attempt)
+            for text in texts:
+                run.draft_parts.append(text)
+                await run.draft_tokens.push(text)
+            return
+
+        # Approved response from the ReviewerAgent; the draft it approved is complete
+        await self._finish_draft(run)
+        for text in texts:
+            run.response_parts.append(text)
+            await run.answer_tokens.push(text)
+
+    async def _start_draft(self, run: _StreamRun, attempt: int) -> None:
+        """
+        Close the previous draft's panel and open a new one for this attempt. Every attempt
+        (and every turn) gets its own agent_id, since the UI keeps one entry per agent_id.
+        """
+        await self._finish_draft(run)
+        run.draft_attempt = attempt
+        run.draft_agent_id = f"primary_agent_{run.request_id[:8]}_{attempt}"
+        run.draft_tokens = TokenBatcher(self._ws_manager, self.session_id, run.draft_agent_id)
+        if attempt > 0:
+            await self._ws_manager.broadcast(
+                self.session_id,
+                {
+                    "type": "orchestrator",
+                    "kind": "notice",
+                    "content": f"ReviewerAgent rejected the previous draft. PrimaryAgent is revising (attempt {attempt}).",
+                },
+            )
+        await self._ws_manager.broadcast(
+            self.session_id,
+            {
+                "type": "agent_start",
+                "agent_id": run.draft_agent_id,
+                "agent_name": "Primary Agent (draft)" if attempt == 0 else f"Primary Agent (revision {attempt})",
+            },
+        )
+
+    async def _finish_draft(self, run: _StreamRun) -> None:
+        """Flush the current draft's tokens and mark its panel complete with the full text."""
+        if run.draft_tokens is None:
+            return
+        draft_tokens, run.draft_tokens = run.draft_tokens, None
+        await draft_tokens.flush()
+        await self._ws_manager.broadcast(
+            self.session_id,
+            {
+                "type": "agent_message",
+                "agent_id": run.draft_agent_id,
+                "role": "assistant",
+                "content": "".join(run.draft_parts),
+            },
+        )
+        run.draft_parts.clear()
@@ -7,6 +7,11 @@ from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.core.credentials import TokenCredential
 
 load_dotenv()  # Load environment variables from .env file if needed  
+
+# Once a session's history exceeds CHAT_HISTORY_MAX_MESSAGES the oldest messages are dropped
+# down to CHAT_HISTORY_TRIM_TO, so the full history is only rewritten every few dozen turns
+CHAT_HISTORY_MAX_MESSAGES = 200
+CHAT_HISTORY_TRIM_TO = 150
   
 class BaseAgent:  
     """  
@@ -52,7 +57,15 @@ class BaseAgent:
   
     def append_to_chat_history(self, messages: List[Dict[str, str]]) -> None:  
         self.chat_history.extend(messages)  
-        self.state_store[f"{self.session_id}_chat_history"] = self.chat_history  
+        history_key = f"{self.session_id}_chat_history"
+        if len(self.chat_history) > CHAT_HISTORY_MAX_MESSAGES:
+            del self.chat_history[:-CHAT_HISTORY_TRIM_TO]
+            self.state_store[history_key] = self.chat_history
+        elif hasattr(self.state_store, "extend_list"):
+            # Append-only write: only the new messages are sent to the backing store
+            self.state_store.extend_list(history_key, messages)
+        else:
+            self.state_store[history_key] = self.chat_history
   
     def set_websocket_manager(self, manager: Any) -> None:
         """
@@ -7,24 +7,30 @@ Only two lines changed compared with your original file:
 Everything else is untouched.  
 """  
   
-import json
+import asyncio
+import functools
+import hashlib
+import importlib
 import os  
 import sys  
 import time
+import uuid
 import logging
 from pathlib import Path  
-from typing import Dict, List, Any, Optional, Set, DefaultDict
-from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Set, DefaultDict, Tuple
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
   
 import httpx
 import jwt
+import orjson
 from jwt.algorithms import RSAAlgorithm
 import uvicorn  
-from fastapi import FastAPI, Depends, Header, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Depends, Header, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi import status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel  
 from dotenv import load_dotenv  
 
@@ -65,6 +71,7 @@ else:
 
 ALLOWED_EMAIL_DOMAIN = (os.getenv("ALLOWED_EMAIL_DOMAIN", "")).strip()
 ALLOWED_EMAIL_DOMAIN_LOWER = ALLOWED_EMAIL_DOMAIN.lower() if ALLOWED_EMAIL_DOMAIN else ""
+EMAIL_CLAIMS = ("preferred_username", "upn", "email")  # checked in this order
 FRONTEND_CLIENT_ID = os.getenv("CLIENT_ID", os.getenv("AAD_CLIENT_ID", ""))
 AAD_API_SCOPE = os.getenv("AAD_API_SCOPE", os.getenv("MCP_SCOPE", ""))
 AUTHORITY = os.getenv("AUTHORITY", "")
@@ -74,22 +81,34 @@ JWKS_URL_TEMPLATE = "https://login.microsoftonline.com/{tenant}/discovery/v2.0/k
 JWKS_CACHE: Dict[str, Dict[str, Any]] = {}
 JWKS_CACHE_EXPIRATION: Dict[str, float] = {}
 JWKS_CACHE_TTL_SECONDS = 3600
+# Parsed RSA public keys by (tenant, kid); rebuilt whenever that tenant's JWKS is re-fetched
+PUBKEY_CACHE: Dict[Tuple[str, str], Any] = {}
+JWKS_REFRESH_MARGIN_SECONDS = 60  # background refresh runs this long before the cache expires
+# Shared pooled client so JWKS fetches reuse warm connections instead of a new TLS handshake each time
+JWKS_CLIENT = httpx.AsyncClient(timeout=5.0, limits=httpx.Limits(max_keepalive_connections=10))
+# Validated tokens by digest -> (exp claim, claims), so a resubmitted token skips the RS256 check
+VALIDATED_TOKENS: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+VALIDATED_TOKENS_MAX_SIZE = 1024
 
 logger = logging.getLogger("auth")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO)
 
 
-def _fetch_jwks(tenant_id: str) -> Dict[str, Any]:
+def _json_dumps(data: Any) -> str:
+    return orjson.dumps(data).decode()
+
+
+async def _fetch_jwks(tenant_id: str, force_refresh: bool = False) -> Dict[str, Any]:
     now = time.time()
     cached = JWKS_CACHE.get(tenant_id)
     expires_at = JWKS_CACHE_EXPIRATION.get(tenant_id, 0)
-    if cached and now < expires_at:
+    if cached and now < expires_at and not force_refresh:
         return cached
 
     url = JWKS_URL_TEMPLATE.format(tenant=tenant_id)
     try:
-        response = httpx.get(url, timeout=5.0)
+        response = await JWKS_CLIENT.get(url)
         response.raise_for_status()
     except httpx.HTTPError as exc:
         raise HTTPException(
@@ -98,12 +117,25 @@ def _fetch_jwks(tenant_id: str) -> Dict[str, Any]:
         ) from exc
 
     data = response.json()
+    for key in [key for key in PUBKEY_CACHE if key[0] == tenant_id]:
+        del PUBKEY_CACHE[key]
     JWKS_CACHE[tenant_id] = data
     JWKS_CACHE_EXPIRATION[tenant_id] = now + JWKS_CACHE_TTL_SECONDS
     return data
 
 
-def _build_public_key(token: str):
+async def _jwks_refresh_loop() -> None:
+    """Re-fetch signing keys shortly before the cache expires so requests never wait on it."""
+    while True:
+        await asyncio.sleep(JWKS_CACHE_TTL_SECONDS - JWKS_REFRESH_MARGIN_SECONDS)
+        try:
+            await _fetch_jwks(AAD_TENANT_ID, force_refresh=True)
+        except Exception:
+            # Any failure (HTTP, bad JSON, transport) must not end the loop
+            logger.warning("Background JWKS refresh failed; keeping cached keys", exc_info=True)
+
+
+async def _build_public_key(token: str):
     try:
         header = jwt.get_unverified_header(token)
     except jwt.PyJWTError as exc:
@@ -113,30 +145,30 @@ def _build_public_key(token: str):
     if not kid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing key id")
 
-    jwks = _fetch_jwks(AAD_TENANT_ID)
+    jwks = await _fetch_jwks(AAD_TENANT_ID)
+    public_key = PUBKEY_CACHE.get((AAD_TENANT_ID, kid))
+    if public_key is not None:
+        return public_key
     for jwk in jwks.get("keys", []):
         if jwk.get("kid") == kid:
-            return RSAAlgorithm.from_jwk(json.dumps(jwk))
+            public_key = RSAAlgorithm.from_jwk(jwk)
+            PUBKEY_CACHE[(AAD_TENANT_ID, kid)] = public_key
+            return public_key
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Signing key not found")
 
 
 def _extract_email(claims: Dict[str, Any]) -> Optional[str]:
-    for claim_name in ("preferred_username", "upn", "email"):
-        value = claims.get(claim_name)
-        if value:
-            return value.lower()
-    return None
+    email = next(filter(None, map(claims.get, EMAIL_CLAIMS)), None)
+    return email.lower() if email else None
 
 
 def _enforce_allowed_domain(claims: Dict[str, Any]) -> None:
-    if not ALLOWED_EMAIL_DOMAIN_LOWER:
-        return
     email = _extract_email(claims)
     if not email or not email.endswith(ALLOWED_EMAIL_DOMAIN_LOWER):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email domain not permitted")
 
 
-def _validate_jwt(token: str) -> Dict[str, Any]:
+async def _validate_jwt(token: str) -> Dict[str, Any]:
     if DISABLE_AUTH:
         return {"sub": "dev-anon"}
     if not token:
@@ -144,7 +176,16 @@ def _validate_jwt(token: str) -> Dict[str, Any]:
     if not AAD_TENANT_ID or not EXPECTED_AUDIENCE:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Authentication not configured")
 
-    public_key = _build_public_key(token)
+    now = time.time()
+    digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = VALIDATED_TOKENS.get(digest)
+    if cached is not None:
+        if now < cached[0]:
+            VALIDATED_TOKENS.move_to_end(digest)
+            return cached[1]
+        del VALIDATED_TOKENS[digest]
+
+    public_key = await _build_public_key(token)
     issuer = f"https://login.microsoftonline.com/{AAD_TENANT_ID}/v2.0"
     allowed_audiences = EXPECTED_AUDIENCES if len(EXPECTED_AUDIENCES) > 1 else EXPECTED_AUDIENCE
     try:
@@ -160,18 +201,24 @@ def _validate_jwt(token: str) -> Dict[str, Any]:
         logger.warning("JWT validation failed: %s", exc)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token validation failed") from exc
 
-    _enforce_allowed_domain(claims)
+    if ALLOWED_EMAIL_DOMAIN_LOWER:
+        _enforce_allowed_domain(claims)
+
+    # Reuse the result until the token itself expires
+    VALIDATED_TOKENS[digest] = (claims.get("exp", now), claims)
+    if len(VALIDATED_TOKENS) > VALIDATED_TOKENS_MAX_SIZE:
+        VALIDATED_TOKENS.popitem(last=False)
     return claims
 
 
-def verify_token(authorization: str | None = Header(None, alias="Authorization")):
+async def verify_token(authorization: str | None = Header(None, alias="Authorization")):
     """Validate Authorization header and return the raw bearer token."""
     if DISABLE_AUTH:
         return "dev-anon-token"
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     token = authorization.split(" ", 1)[1]
-    _validate_jwt(token)
+    await _validate_jwt(token)
     return token
 
 # ------------------------------------------------------------------  
@@ -200,14 +247,21 @@ AVAILABLE_AGENTS = _load_available_agents()
 # Current active agent module (can be changed at runtime)
 CURRENT_AGENT_MODULE = AVAILABLE_AGENTS[0]
 
+# module path -> Agent class; filled for every available module at startup
+AGENT_CLASSES: Dict[str, Any] = {}
+
 def load_agent_class(module_path: str):
-    """Dynamically load and return the Agent class from the given module path."""
+    """Return the Agent class for the given module path, importing the module on first use."""
+    agent_class = AGENT_CLASSES.get(module_path)
+    if agent_class is not None:
+        return agent_class
     try:
-        agent_module = __import__(module_path, fromlist=["Agent"])  # type: ignore[arg-type]
-        return getattr(agent_module, "Agent")
+        agent_class = getattr(importlib.import_module(module_path), "Agent")
     except Exception as e:
         print(f"Error loading agent module {module_path}: {e}")
         raise
+    AGENT_CLASSES[module_path] = agent_class
+    return agent_class
 
 # Load initial agent
 Agent = load_agent_class(CURRENT_AGENT_MODULE)  
@@ -218,11 +272,117 @@ Agent = load_agent_class(CURRENT_AGENT_MODULE)
 from utils import get_state_store  
   
 STATE_STORE = get_state_store()  # either dict or CosmosDBStateStore  
+
+# ------------------------------------------------------------------  
+# Per-session agent cache (avoids rebuilding model/MCP clients on every message)  
+# ------------------------------------------------------------------  
+AGENT_CACHE_MAX_SIZE = 512
+# A store other than the in-memory dict (Cosmos DB) may be written by other workers or replicas,
+# so a cached agent is only reused while its history still matches the stored one
+SHARED_STATE_STORE = not isinstance(STATE_STORE, dict)
+# session_id -> (agent, access token it was built with, Agent class it was built from)
+AGENT_CACHE: "OrderedDict[str, Tuple[Any, Optional[str], Any]]" = OrderedDict()
+# session_id -> [lock, number of turns holding or waiting for it]; a cached agent (e.g. a
+# workflow) cannot run two turns at once, so each session's turns run one after another
+SESSION_TURN_LOCKS: Dict[str, List[Any]] = {}
+
+
+@asynccontextmanager
+async def session_turn(session_id: str) -> AsyncIterator[None]:
+    """Hold the session's turn lock; the entry is dropped once no turn needs it."""
+    entry = SESSION_TURN_LOCKS.get(session_id)
+    if entry is None:
+        entry = SESSION_TURN_LOCKS[session_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            SESSION_TURN_LOCKS.pop(session_id, None)
+
+
+async def _close_agent(agent: Any) -> None:
+    aclose = getattr(agent, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+async def get_agent(session_id: str, token: Optional[str]) -> Any:
+    """
+    Return the session's cached agent, rebuilding it if the token or active agent module changed,
+    or (with a shared state store) if the stored history changed behind it, e.g. written or
+    reset by another worker. Call it inside session_turn(session_id) and keep the lock for as
+    long as the agent runs.
+    """
+    entry = AGENT_CACHE.get(session_id)
+    if entry is not None:
+        agent, agent_token, agent_class = entry
+        fresh = (
+            not SHARED_STATE_STORE
+            or STATE_STORE.get(f"{session_id}_chat_history", []) == getattr(agent, "chat_history", None)
+        )
+        if agent_token == token and agent_class is Agent and fresh:
+            AGENT_CACHE.move_to_end(session_id)
+            return agent
+        await _close_agent(agent)
+
+    # Propagate the bearer token down to the agent so it can call the MCP (via APIM)
+    try:
+        agent = Agent(STATE_STORE, session_id, access_token=token)
+    except TypeError:
+        agent = Agent(STATE_STORE, session_id)
+    AGENT_CACHE[session_id] = (agent, token, Agent)
+    AGENT_CACHE.move_to_end(session_id)
+    if len(AGENT_CACHE) > AGENT_CACHE_MAX_SIZE:
+        _, (evicted, _, _) = AGENT_CACHE.popitem(last=False)
+        await _close_agent(evicted)
+    return agent
+
+
+async def evict_agent(session_id: str) -> None:
+    entry = AGENT_CACHE.pop(session_id, None)
+    if entry is not None:
+        await _close_agent(entry[0])
   
 # ------------------------------------------------------------------  
 # FastAPI app  
 # ------------------------------------------------------------------  
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+
+@app.on_event("startup")
+async def start_jwks_refresh() -> None:
+    if not DISABLE_AUTH and AAD_TENANT_ID:
+        # Fetch signing keys before serving so the first request does not pay for it;
+        # refuse to start if Azure AD cannot be reached
+        try:
+            await _fetch_jwks(AAD_TENANT_ID)
+        except HTTPException as exc:
+            raise RuntimeError(f"Unable to fetch Azure AD signing keys for tenant {AAD_TENANT_ID}") from exc
+        app.state.jwks_refresh_task = asyncio.create_task(_jwks_refresh_loop())
+
+
+@app.on_event("startup")
+async def preload_agent_classes() -> None:
+    # Import every available agent module up front (in threads, concurrently) so switching
+    # agents via /agents/set is a dict lookup; a module that fails here is retried on demand
+    await asyncio.gather(
+        *(asyncio.to_thread(load_agent_class, module_path) for module_path in AVAILABLE_AGENTS),
+        return_exceptions=True,
+    )
+
+
+@app.on_event("shutdown")
+async def stop_jwks_refresh() -> None:
+    task = getattr(app.state, "jwks_refresh_task", None)
+    if task:
+        task.cancel()
+    for turn in list(CHAT_TURN_TASKS):
+        turn.cancel()
+    await JWKS_CLIENT.aclose()
+
 
 # Add CORS middleware to handle preflight OPTIONS requests from React frontend
 app.add_middleware(
@@ -240,44 +400,115 @@ STATIC_DIR = Path(__file__).parent / "static"
 STATIC_ASSET_DIR_VITE = STATIC_DIR / "assets"  # Vite structure
 STATIC_ASSET_DIR_CRA = STATIC_DIR / "static"   # CRA structure
 
-if STATIC_ASSET_DIR_VITE.exists():  # Vite build places assets in /assets directory
-    app.mount("/assets", StaticFiles(directory=str(STATIC_ASSET_DIR_VITE)), name="assets")
-elif STATIC_ASSET_DIR_CRA.exists():  # CRA build places assets in nested /static directory
-    app.mount("/static", StaticFiles(directory=str(STATIC_ASSET_DIR_CRA)), name="static")
-elif STATIC_DIR.exists():
-    app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# In production, let a reverse proxy serve the bundle so Python never sees asset requests,
+# and set SERVE_STATIC=false. Example nginx config:
+#     location /assets/ { alias /app/static/assets/; expires 1y; add_header Cache-Control "public, immutable"; }
+#     location / { proxy_pass http://127.0.0.1:3000; proxy_http_version 1.1;
+#                  proxy_set_header Upgrade $http_upgrade; proxy_set_header Connection "upgrade";
+#                  proxy_buffering off; }
+SERVE_STATIC = os.getenv("SERVE_STATIC", "true").lower() in ("1", "true", "yes")
+
+if SERVE_STATIC:
+    if STATIC_ASSET_DIR_VITE.exists():  # Vite build places assets in /assets directory
+        app.mount("/assets", StaticFiles(directory=str(STATIC_ASSET_DIR_VITE)), name="assets")
+    elif STATIC_ASSET_DIR_CRA.exists():  # CRA build places assets in nested /static directory
+        app.mount("/static", StaticFiles(directory=str(STATIC_ASSET_DIR_CRA)), name="static")
+    elif STATIC_DIR.exists():
+        app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # ---------------------------------------------------------------
 # WebSocket connection manager (per session broadcast)
 # ---------------------------------------------------------------
+WS_SEND_TIMEOUT_SECONDS = 1.0
+TOKEN_FLUSH_INTERVAL_SECONDS = 0.016  # streamed "token" events are coalesced over this window
+
+
 class ConnectionManager:
     def __init__(self) -> None:
-        self.sessions: DefaultDict[str, Set[WebSocket]] = defaultdict(set)
+        self.sessions: Dict[str, Set[WebSocket]] = {}
+        # Coalesced "token" content per session, and the timer that will flush it
+        self._pending_tokens: Dict[str, List[str]] = {}
+        self._flush_timers: Dict[str, asyncio.Task] = {}
+        # Keeps a session's frames in order while tokens flush in the background
+        self._send_locks: DefaultDict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
 
     async def connect(self, session_id: str, ws: WebSocket) -> None:
-        self.sessions[session_id].add(ws)
+        self.sessions.setdefault(session_id, set()).add(ws)
 
     def disconnect(self, session_id: str, ws: WebSocket) -> None:
-        if session_id in self.sessions:
-            self.sessions[session_id].discard(ws)
-            if not self.sessions[session_id]:
+        sockets = self.sessions.get(session_id)
+        if sockets is not None:
+            sockets.discard(ws)
+            if not sockets:
                 self.sessions.pop(session_id, None)
+                self._pending_tokens.pop(session_id, None)
+                self._send_locks.pop(session_id, None)
+                timer = self._flush_timers.pop(session_id, None)
+                if timer is not None and timer is not asyncio.current_task():
+                    timer.cancel()
 
     async def broadcast(self, session_id: str, message: dict) -> None:
-        dead: list[WebSocket] = []
-        for ws in list(self.sessions.get(session_id, [])):
-            try:
-                await ws.send_json(message)
-            except Exception:
-                dead.append(ws)
+        if not self.sessions.get(session_id):
+            # Nobody is listening (e.g. a /chat turn with no socket open); keep no per-session state
+            return
+        if message.get("type") == "token":
+            # Many tiny token frames become one larger "token" frame per flush window
+            self._pending_tokens.setdefault(session_id, []).append(message.get("content") or "")
+            if session_id not in self._flush_timers:
+                self._flush_timers[session_id] = asyncio.create_task(self._flush_later(session_id))
+            return
+        async with self._send_locks[session_id]:
+            await self._flush_tokens(session_id)
+            await self._send(session_id, message)
+
+    async def _flush_later(self, session_id: str) -> None:
+        await asyncio.sleep(TOKEN_FLUSH_INTERVAL_SECONDS)
+        async with self._send_locks[session_id]:
+            await self._flush_tokens(session_id)
+
+    async def _flush_tokens(self, session_id: str) -> None:
+        """Send buffered tokens as one event; the caller holds the session's send lock."""
+        timer = self._flush_timers.pop(session_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        tokens = self._pending_tokens.pop(session_id, None)
+        if tokens:
+            await self._send(session_id, {"type": "token", "content": "".join(tokens)})
+
+    async def _send(self, session_id: str, message: dict) -> None:
+        sockets = self.sessions.get(session_id)
+        if not sockets:
+            return
+        # Encode once for all sockets; text frames keep the browser's JSON.parse(event.data) working
+        payload = _json_dumps(message)
+        # Send to every socket at once so one slow client does not hold up the others;
+        # a socket that errors or stalls past the timeout is dropped once all sends finish
+        dead: List[WebSocket] = []
+        await asyncio.gather(*(self._send_one(ws, payload, dead) for ws in sockets))
         for ws in dead:
             self.disconnect(session_id, ws)
+            # Close it as well, so the client sees the drop and reconnects instead of going quiet
+            try:
+                await asyncio.wait_for(ws.close(), timeout=WS_SEND_TIMEOUT_SECONDS)
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _send_one(ws: WebSocket, payload: str, dead: List[WebSocket]) -> None:
+        try:
+            await asyncio.wait_for(ws.send_text(payload), timeout=WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            dead.append(ws)
 
 MANAGER = ConnectionManager()
 
 # Make MANAGER globally accessible for background tasks
 import builtins
 builtins.GLOBAL_WS_MANAGER = MANAGER
+
+
+# Turns started by /chat with "Prefer: respond-async"; held here so they are not garbage collected
+CHAT_TURN_TASKS: Set[asyncio.Task] = set()
   
   
 class ChatRequest(BaseModel):  
@@ -318,23 +549,82 @@ async def get_auth_config():
         allowedDomain=ALLOWED_EMAIL_DOMAIN if ALLOWED_EMAIL_DOMAIN else None,
     )
   
+@app.get("/healthz")
+async def healthz():
+    """Readiness probe: OK once signing keys are cached (the agent module is imported at load)."""
+    if not DISABLE_AUTH and AAD_TENANT_ID not in JWKS_CACHE:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ok", "agent": CURRENT_AGENT_MODULE}
+
 @app.post("/chat", response_model=ChatResponse)  
-async def chat(req: ChatRequest, token: str = Depends(verify_token)):  
-    # Propagate the bearer token down to the agent so it can call the MCP (via APIM)
-    try:
-        agent = Agent(STATE_STORE, req.session_id, access_token=token)
-    except TypeError:
-        agent = Agent(STATE_STORE, req.session_id)
-    answer = await agent.chat_async(req.prompt)  
+async def chat(req: ChatRequest, request: Request, token: str = Depends(verify_token)):  
+    # Clients that accept Server-Sent Events get tokens as they are generated
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_chat_events(req.session_id, token, req.prompt),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    # Clients that send "Prefer: respond-async" get 202 straight away; the turn keeps running
+    # in the background and its events reach the session's WebSocket like a /ws/chat turn
+    if "respond-async" in request.headers.get("prefer", ""):
+        task_id = uuid.uuid4().hex
+        task = asyncio.create_task(_run_chat_turn(req.session_id, token, req.prompt, task_id))
+        CHAT_TURN_TASKS.add(task)
+        task.add_done_callback(CHAT_TURN_TASKS.discard)
+        return JSONResponse({"task_id": task_id}, status_code=status.HTTP_202_ACCEPTED)
+    async with session_turn(req.session_id):
+        agent = await get_agent(req.session_id, token)
+        answer = await agent.chat_async(req.prompt)  
     return ChatResponse(response=answer)  
+
+
+async def _run_chat_turn(session_id: str, token: str, prompt: str, task_id: str) -> None:
+    """Run a /chat turn detached from its request, broadcasting events to the session's sockets."""
+    try:
+        async with session_turn(session_id):
+            agent = await get_agent(session_id, token)
+            if hasattr(agent, "set_websocket_manager"):
+                agent.set_websocket_manager(MANAGER)
+            await _stream_agent_turn(agent, session_id, prompt)
+        await MANAGER.broadcast(session_id, {"type": "done", "task_id": task_id})
+    except Exception as e:
+        logger.warning("Background chat turn %s failed: %s", task_id, e)
+        await MANAGER.broadcast(session_id, {"type": "error", "message": str(e), "task_id": task_id})
+
+
+async def _stream_chat_events(session_id: str, token: str, prompt: str):
+    """Yield SSE frames using the same event types as the WebSocket endpoint."""
+    def sse(event: dict) -> str:
+        return f"data: {_json_dumps(event)}\n\n"
+
+    try:
+        # The turn lock is held for as long as the response streams
+        async with session_turn(session_id):
+            agent = await get_agent(session_id, token)
+            if hasattr(agent, "chat_stream"):
+                async for event in agent.chat_stream(prompt):
+                    evt = await serialize_autogen_event(event)
+                    if evt and evt.get("type") in ("token", "message", "final"):
+                        yield sse(evt)
+            else:
+                # Agents without token streaming still answer over the same stream
+                yield sse({"type": "final", "content": await agent.chat_async(prompt)})
+        yield sse({"type": "done"})
+    except Exception as e:
+        yield sse({"type": "error", "message": str(e)})
   
 @app.post("/reset_session")  
 async def reset_session(req: SessionResetRequest, token: str = Depends(verify_token)):  
-    if req.session_id in STATE_STORE:  
-        del STATE_STORE[req.session_id]  
-    hist_key = f"{req.session_id}_chat_history"  
-    if hist_key in STATE_STORE:  
-        del STATE_STORE[hist_key]
+    # Wait for a running turn so its agent is not closed (or its history rewritten) under it
+    async with session_turn(req.session_id):
+        await evict_agent(req.session_id)
+        if req.session_id in STATE_STORE:  
+            del STATE_STORE[req.session_id]  
+        hist_key = f"{req.session_id}_chat_history"  
+        if hist_key in STATE_STORE:  
+            del STATE_STORE[hist_key]
+        STATE_STORE.pop(f"{req.session_id}_messages_cache", None)
     return {"status": "success", "message": "Session reset successfully"}
 
 @app.get("/history/{session_id}", response_model=ConversationHistoryResponse)  
@@ -421,12 +711,16 @@ async def set_active_agent(req: SetAgentRequest, token: str = Depends(verify_tok
 # ──────────────────────────────────────────────────────────────
 # Root route to serve React app
 # ──────────────────────────────────────────────────────────────
+INDEX_PATH = STATIC_DIR / "index.html"
+# stat() once at startup so serving index.html skips the per-request filesystem check
+INDEX_STAT = os.stat(INDEX_PATH) if SERVE_STATIC and INDEX_PATH.exists() else None
+
+
 @app.get("/")
 async def read_root():
     """Serve the React frontend index.html"""
-    index_path = STATIC_DIR / "index.html"
-    if index_path.exists():
-        return FileResponse(str(index_path))
+    if INDEX_STAT is not None:
+        return FileResponse(str(INDEX_PATH), stat_result=INDEX_STAT)
     return {"message": "OpenAI Workshop Backend API", "version": "1.0.0"}
 
 # ──────────────────────────────────────────────────────────────
@@ -438,6 +732,10 @@ async def read_root():
 async def ws_chat(ws: WebSocket):
     await ws.accept()
     connected_session: Optional[str] = None
+    turn_group: Optional[asyncio.TaskGroup] = None  # task group of the turn in progress, if any
+    # Token this connection last validated and its exp claim; an unchanged token is not re-checked
+    validated_token: Optional[str] = None
+    validated_until = 0.0
     try:
         while True:
             data = await ws.receive_json()
@@ -449,70 +747,62 @@ async def ws_chat(ws: WebSocket):
                 token = token or "dev-anon-token"
             else:
                 if not token:
-                    await ws.send_json({"type": "error", "message": "Missing access_token"})
+                    await ws.send_text(_json_dumps({"type": "error", "message": "Missing access_token"}))
                     continue
                 try:
-                    _validate_jwt(token)
+                    if token != validated_token or time.time() >= validated_until:
+                        claims = await _validate_jwt(token)
+                        validated_token, validated_until = token, claims.get("exp", 0.0)
                 except HTTPException as exc:
-                    await ws.send_json({
+                    await ws.send_text(_json_dumps({
                         "type": "error",
                         "message": exc.detail or "Unauthorized",
                         "status": exc.status_code,
-                    })
+                    }))
                     continue
 
             if not session_id:
-                await ws.send_json({"type": "error", "message": "Missing session_id"})
+                await ws.send_text(_json_dumps({"type": "error", "message": "Missing session_id"}))
                 continue
             if connected_session is None:
                 await MANAGER.connect(session_id, ws)
                 connected_session = session_id
-                await ws.send_json({"type": "info", "message": f"Registered session {session_id}"})
+                await ws.send_text(_json_dumps({"type": "info", "message": f"Registered session {session_id}"}))
 
             # If only registering (no prompt) continue
             if not prompt:
                 continue
 
-            # Create agent for this session
-            try:
-                agent = Agent(STATE_STORE, session_id, access_token=token)
-            except TypeError:
-                agent = Agent(STATE_STORE, session_id)
-
-            # Inject WebSocket manager for Magentic streaming
-            if hasattr(agent, "set_websocket_manager"):
-                agent.set_websocket_manager(MANAGER)
-
-            # Set progress sink if supported (for some agent types)
-            if hasattr(agent, "set_progress_sink"):
-                async def progress_sink(ev: dict):
-                    # Broadcast progress events
-                    await MANAGER.broadcast(session_id, ev)
-                agent.set_progress_sink(progress_sink)
-
-            # Stream events from agent
-            try:
-                # Check if agent supports streaming (Autogen or Agent Framework)
-                if hasattr(agent, "chat_stream"):
-                    # Autogen streaming
-                    async for event in agent.chat_stream(prompt):
-                        evt = await serialize_autogen_event(event)
-                        if evt and evt.get("type") in ("token", "message", "final"):
-                            await MANAGER.broadcast(session_id, evt)
-                elif hasattr(agent, "chat_async"):
-                    # Agent Framework - may or may not use streaming callback
-                    result = await agent.chat_async(prompt)
-                    # If agent has _ws_manager attribute, it supports streaming and events sent via callback
-                    # Otherwise, broadcast final result here
-                    if not hasattr(agent, "_ws_manager"):
-                        await MANAGER.broadcast(session_id, {"type": "final_result", "content": result})
-                    # Else: events including final result are sent via streaming callback
-                else:
-                    await MANAGER.broadcast(session_id, {"type": "error", "message": "Agent does not support streaming"})
-
-                await MANAGER.broadcast(session_id, {"type": "done"})
-            except Exception as e:
-                await MANAGER.broadcast(session_id, {"type": "error", "message": str(e)})
+            # One turn at a time per session, whichever endpoint it came from
+            async with session_turn(session_id):
+                # Reuse this session's agent (rebuilt when the token or agent module changes)
+                agent = await get_agent(session_id, token)
+
+                # Inject WebSocket manager for Magentic streaming
+                if hasattr(agent, "set_websocket_manager"):
+                    agent.set_websocket_manager(MANAGER)
+
+                # Set progress sink if supported (for some agent types)
+                if hasattr(agent, "set_progress_sink"):
+                    async def progress_sink(ev: dict):
+                        # Broadcast progress events alongside the running turn when there is one
+                        if turn_group is not None:
+                            turn_group.create_task(MANAGER.broadcast(session_id, ev))
+                        else:
+                            await MANAGER.broadcast(session_id, ev)
+                    agent.set_progress_sink(progress_sink)
+
+                # Stream events from agent. The task group awaits every broadcast of the turn before
+                # "done", and a failure cancels the rest so nothing is sent after the error.
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        turn_group = tg
+                        tg.create_task(_stream_agent_turn(agent, session_id, prompt))
+                    await MANAGER.broadcast(session_id, {"type": "done"})
+                except* Exception as eg:
+                    await MANAGER.broadcast(session_id, {"type": "error", "message": str(eg.exceptions[0])})
+                finally:
+                    turn_group = None
     except WebSocketDisconnect:
         pass
     except Exception as e:
@@ -523,62 +813,121 @@ async def ws_chat(ws: WebSocket):
             MANAGER.disconnect(connected_session, ws)
 
 
+async def _stream_agent_turn(agent: Any, session_id: str, prompt: str) -> None:
+    """Run one agent turn, broadcasting its events to the session's sockets."""
+    # Check if agent supports streaming (Autogen or Agent Framework)
+    if hasattr(agent, "chat_stream"):
+        # Autogen streaming
+        async for event in agent.chat_stream(prompt):
+            evt = await serialize_autogen_event(event)
+            if evt and evt.get("type") in ("token", "message", "final"):
+                await MANAGER.broadcast(session_id, evt)
+    elif hasattr(agent, "chat_async"):
+        # Agent Framework - may or may not use streaming callback
+        result = await agent.chat_async(prompt)
+        # If agent has _ws_manager attribute, it supports streaming and events sent via callback
+        # Otherwise, broadcast final result here
+        if not hasattr(agent, "_ws_manager"):
+            await MANAGER.broadcast(session_id, {"type": "final_result", "content": result})
+        # Else: events including final result are sent via streaming callback
+    else:
+        await MANAGER.broadcast(session_id, {"type": "error", "message": "Agent does not support streaming"})
+
+
 # Helper: serialize Autogen streaming events to JSON
-async def serialize_autogen_event(event: Any) -> Optional[dict]:
-    """
-    Convert Autogen streaming event (BaseChatMessage | BaseAgentEvent | Response) to a JSON-friendly dict.
-    """
+def _tool_call_event(event: Any) -> dict:
+    # includes FunctionCall list
+    calls = []
+    for c in event.content:
+        try:
+            calls.append({"name": c.name, "arguments": c.arguments})
+        except Exception:
+            pass
+    return {"type": "tool_call", "calls": calls}
+
+
+def _tool_result_event(event: Any) -> dict:
+    # results list
+    results = []
+    for r in event.content:
+        try:
+            results.append({"is_error": r.is_error, "content": r.content, "name": r.name})
+        except Exception:
+            pass
+    return {"type": "tool_result", "results": results}
+
+
+def _final_event(event: Any) -> dict:
+    # Final assistant message in Response.chat_message
+    msg = event.chat_message
+    if hasattr(msg, "content"):
+        return {"type": "final", "content": getattr(msg, "content")}
+    return {"type": "final"}
+
+
+@functools.lru_cache(maxsize=1)
+def _autogen_event_handlers() -> Dict[type, Callable[[Any], Optional[dict]]]:
+    """Event type -> serializer table, built on first use (empty if Autogen is not installed)."""
     try:
         # Lazy imports to avoid hard dep here
         from autogen_agentchat.messages import TextMessage, ToolCallSummaryMessage, HandoffMessage, StructuredMessage
         from autogen_agentchat.messages import ModelClientStreamingChunkEvent, ThoughtEvent, ToolCallRequestEvent, ToolCallExecutionEvent
         from autogen_agentchat.base import Response
+    except ImportError:
+        return {}
+
+    return {
+        ModelClientStreamingChunkEvent: lambda e: {"type": "token", "content": e.content},
+        TextMessage: lambda e: (
+            {"type": "message", "role": "assistant", "content": e.content} if e.source != "user" else None
+        ),
+        ThoughtEvent: lambda e: {"type": "thought", "content": e.content},
+        ToolCallRequestEvent: _tool_call_event,
+        ToolCallExecutionEvent: _tool_result_event,
+        ToolCallSummaryMessage: lambda e: {"type": "tool_summary", "content": e.content},
+        HandoffMessage: lambda e: {"type": "handoff", "target": e.target, "content": getattr(e, "content", "")},
+        StructuredMessage: lambda e: {"type": "structured", "content": getattr(e, "content", {})},
+        Response: _final_event,
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def _autogen_event_handler(event_type: type) -> Optional[Callable[[Any], Optional[dict]]]:
+    """Resolve the serializer for a concrete event type through its MRO (memoized per type)."""
+    handlers = _autogen_event_handlers()
+    for base in event_type.__mro__:
+        handler = handlers.get(base)
+        if handler is not None:
+            return handler
+    return None
 
-        if isinstance(event, ModelClientStreamingChunkEvent):
-            return {"type": "token", "content": event.content}
-        if isinstance(event, TextMessage):
-            if event.source != "user":
-                return {"type": "message", "role": "assistant", "content": event.content}
-        if isinstance(event, ThoughtEvent):
-            return {"type": "thought", "content": event.content}
-        if isinstance(event, ToolCallRequestEvent):
-            # includes FunctionCall list
-            calls = []
-
-            for c in event.content:
-                try:
-                    calls.append({"name": c.name, "arguments": c.arguments})
-                except Exception:
-                    pass
-            return {"type": "tool_call", "calls": calls}
-        if isinstance(event, ToolCallExecutionEvent):
-            # results list
-            results = []
-            for r in event.content:
-                try:
-                    results.append({"is_error": r.is_error, "content": r.content, "name": r.name})
-                except Exception:
-                    pass
-            return {"type": "tool_result", "results": results}
-        if isinstance(event, ToolCallSummaryMessage):
-            return {"type": "tool_summary", "content": event.content}
-        if isinstance(event, HandoffMessage):
-            return {"type": "handoff", "target": event.target, "content": getattr(event, "content", "")}
-        if isinstance(event, StructuredMessage):
-            return {"type": "structured", "content": getattr(event, "content", {})}
-        if isinstance(event, Response):
-
-            # Final assistant message in Response.chat_message
-            msg = event.chat_message
-            if hasattr(msg, "content"):
-                return {"type": "final", "content": getattr(msg, "content")}
-            return {"type": "final"}
+
+async def serialize_autogen_event(event: Any) -> Optional[dict]:
+    """
+    Convert Autogen streaming event (BaseChatMessage | BaseAgentEvent | Response) to a JSON-friendly dict.
+    """
+    handler = _autogen_event_handler(type(event))
+    if handler is None:
         # Fallthrough: ignore unknown types
         return None
+    try:
+        return handler(event)
     except Exception:
         return None
 
   
   
 if __name__ == "__main__":  
-    uvicorn.run(app, host="0.0.0.0", port=7000)
\ No newline at end of file
+    # Import-string form so uvicorn can start worker processes. Keep UVICORN_WORKERS at 1 with the
+    # in-memory state store, since every worker would otherwise hold its own sessions.
+    # loop="auto" picks uvloop where it is installed (it is not available on Windows).
+    uvicorn.run(
+        "backend:app",
+        host="0.0.0.0",
+        port=7000,
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        loop="auto",
+        http="httptools",
+        limit_concurrency=1000,
+        timeout_keep_alive=30,
+    )
\ No newline at end of file
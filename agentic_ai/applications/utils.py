@@ -155,6 +155,26 @@ class CosmosDBStateStore(abc.MutableMapping):
             }
         )
   
+    def extend_list(self, session_id: str, items: List[Any]) -> None:  
+        """
+        Append items to a stored list with Cosmos partial document updates
+        instead of re-writing the whole document.
+        """
+        operations = [
+            {"op": "add", "path": "/value/-", "value": make_json_serializable(item)}
+            for item in items
+        ]
+        try:
+            # Cosmos accepts at most 10 patch operations per request
+            for start in range(0, len(operations), 10):
+                self.container.patch_item(
+                    item=session_id,
+                    partition_key=[self.tenant_id, session_id],
+                    patch_operations=operations[start:start + 10],
+                )
+        except cosmos_exceptions.CosmosResourceNotFoundError:
+            self[session_id] = list(items)
+
     def __delitem__(self, session_id: str) -> None:  
         try:  
             self.container.delete_item(
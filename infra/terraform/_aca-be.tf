@@ -73,7 +73,7 @@ resource "azurerm_container_app" "backend" {
       readiness_probe {
         port      = var.backend_target_port
         transport = "HTTP"
-        path      = "/docs"
+        path      = "/healthz"
 
         initial_delay           = 10
         interval_seconds        = 30